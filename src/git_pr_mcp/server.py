@@ -1,13 +1,32 @@
 import subprocess
+import asyncio
 import logging
 from typing import Optional, Annotated
 from mcp.server.fastmcp import FastMCP, Context
 import os
 from github import Github, Auth
+from github.Repository import Repository
 import tempfile
-import re
 import shutil
 import json
+import threading
+import atexit
+import time
+import itertools
+import mmap
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+
+try:
+    import pygit2  # Optional: in-process libgit2 bindings; tools fall back to the git CLI without it
+except ImportError:
+    pygit2 = None
+
+try:
+    import orjson  # Optional: faster (de)serialization of the state file; falls back to json
+except ImportError:
+    orjson = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,35 +42,48 @@ active_repo_details = {
 }
 
 def _save_state():
-    """Saves the current active_repo_details to the state file."""
+    """Saves the current active_repo_details to the state file.
+
+    The state is written compactly to a temporary file that then replaces the state file,
+    so a crash mid-write never leaves a truncated file behind.
+    """
     try:
-        with open(STATE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(active_repo_details, f, indent=4)
-        logger.info(f"Saved active repository state to {STATE_FILE}")
+        if orjson is not None:
+            data = orjson.dumps(active_repo_details)
+        else:
+            data = json.dumps(active_repo_details).encode('utf-8')
+        tmp_path = STATE_FILE + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, STATE_FILE)
+        logger.info("Saved active repository state to %s", STATE_FILE)
     except Exception as e:
-        logger.error(f"Failed to save state to {STATE_FILE}: {str(e)}")
+        logger.error("Failed to save state to %s: %s", STATE_FILE, e)
 
 def _load_state():
     """Loads active_repo_details from the state file if it exists and is valid."""
     global active_repo_details
     try:
         if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, 'r', encoding='utf-8') as f:
-                loaded_details = json.load(f)
+            with open(STATE_FILE, 'rb') as f:
+                data = f.read()
+            loaded_details = orjson.loads(data) if orjson is not None else json.loads(data)
             # Validate that the path (if present) still exists
             if loaded_details.get("path") and os.path.isdir(loaded_details["path"]):
                 active_repo_details = loaded_details
-                logger.info(f"Loaded active repository state from {STATE_FILE}: {active_repo_details['path']}")
+                logger.info("Loaded active repository state from %s: %s", STATE_FILE, active_repo_details['path'])
             elif loaded_details.get("path"):
-                logger.warning(f"State file {STATE_FILE} references a path that no longer exists: {loaded_details['path']}. Ignoring.")
+                logger.warning("State file %s references a path that no longer exists: %s. Ignoring.", STATE_FILE, loaded_details['path'])
                 # Optionally, delete the state file or clear its path entry if it's invalid
                 # For now, just ignore and start fresh. The next clone will overwrite.
             else:
-                logger.info(f"State file {STATE_FILE} loaded but no valid path found. Starting fresh.")
+                logger.info("State file %s loaded but no valid path found. Starting fresh.", STATE_FILE)
         else:
-            logger.info(f"{STATE_FILE} not found. Starting with a fresh state.")
+            logger.info("%s not found. Starting with a fresh state.", STATE_FILE)
     except Exception as e:
-        logger.error(f"Failed to load state from {STATE_FILE}: {str(e)}. Starting with a fresh state.")
+        logger.error("Failed to load state from %s: %s. Starting with a fresh state.", STATE_FILE, e)
 
 if not os.getenv("GITHUB_TOKEN"):
     raise ValueError("GITHUB_TOKEN environment variable is not set. PyGithub tools will not work.")
@@ -59,9 +91,37 @@ if not os.getenv("GITHUB_TOKEN"):
 auth = Auth.Token(os.getenv("GITHUB_TOKEN"))
 g: Github = Github(auth=auth)
 
+# PyGithub Repository objects keyed by "owner/name"
+_gh_repo_cache: dict[str, Repository] = {}
+
+def _get_gh_repo(repo_full_name: str) -> Repository:
+    """Returns a cached, lazily-loaded PyGithub Repository; no API request is made until an attribute needs one."""
+    gh_repo = _gh_repo_cache.get(repo_full_name)
+    if gh_repo is None:
+        gh_repo = _gh_repo_cache[repo_full_name] = g.get_repo(repo_full_name, lazy=True)
+    return gh_repo
+
 mcp = FastMCP("git-pr-mcp")
 _load_state()
 
+# MCP log levels from least to most severe, and the minimum each client session asked for via logging/setLevel
+_CLIENT_LOG_LEVELS = ("debug", "info", "notice", "warning", "error", "critical", "alert", "emergency")
+_session_log_levels: "weakref.WeakKeyDictionary[object, int]" = weakref.WeakKeyDictionary()
+
+def _set_session_log_level(session, level: str):
+    _session_log_levels[session] = _CLIENT_LOG_LEVELS.index(level)
+
+@mcp._mcp_server.set_logging_level()
+async def _handle_set_log_level(level: str):
+    _set_session_log_level(mcp._mcp_server.request_context.session, level)
+
+async def _ctx_log(ctx: Context, level: str, template: str, *args):
+    """Sends a %-style message to the client, formatting it only if the session's log level lets it through."""
+    session = getattr(ctx, "session", None)
+    threshold = _session_log_levels.get(session, 0) if session is not None else 0
+    if _CLIENT_LOG_LEVELS.index(level) >= threshold:
+        await getattr(ctx, level)(template % args if args else template)
+
 # Configure git user identity and GitHub OAuth token
 def _configure_git():
     """Configure git user identity and GitHub token for authentication."""
@@ -73,7 +133,7 @@ def _configure_git():
         if git_user_name and git_user_email:
             subprocess.run(["git", "config", "--global", "user.name", git_user_name], check=True)
             subprocess.run(["git", "config", "--global", "user.email", git_user_email], check=True)
-            logger.info(f"Configured git user identity: {git_user_name} <{git_user_email}>")
+            logger.info("Configured git user identity: %s <%s>", git_user_name, git_user_email)
         else:
             logger.warning("GIT_USER_NAME and/or GIT_USER_EMAIL not set - git commits may fail")
 
@@ -93,65 +153,649 @@ def _configure_git():
             logger.warning("GITHUB_TOKEN not found - git push operations may fail")
 
     except Exception as e:
-        logger.warning(f"Failed to configure git settings: {str(e)}")
+        logger.warning("Failed to configure git settings: %s", e)
 
 _configure_git()
 
-# Helper function to parse repo URL (simplistic)
+# Characters GitHub allows in owner/repo names besides letters and digits
+_URL_PART_PUNCTUATION = str.maketrans("", "", "_.-")
+
+def _is_url_part(part: str) -> bool:
+    """True if part is non-empty and made only of word characters, '.' and '-' (what GitHub allows in owner/repo names)."""
+    letters_and_digits = part.translate(_URL_PART_PUNCTUATION)
+    return bool(part) and (not letters_and_digits or letters_and_digits.isalnum())
+
+# Helper function to parse repo URL (simplistic); results are memoized since the same remotes recur across calls
+@functools.lru_cache(maxsize=256)
 def _parse_repo_url(repo_url: str) -> tuple[Optional[str], Optional[str]]:
-    # Regex to capture owner and repo name from common Git URL patterns
     # Supports https://github.com/owner/repo.git, git@github.com:owner/repo.git, https://github.com/owner/repo
-    # The regex captures the owner and the repo name (which might include .git suffix).
-    # The .git suffix is then removed in Python code.
-    pattern = r"(?:https?://[^/]+/|git@[\w.-]+:)([^/]+)/([^/]+)$" 
-    match = re.search(pattern, repo_url)
-    if match:
-        owner = match.group(1)
-        name_with_suffix = match.group(2)
-        if name_with_suffix.endswith(".git"):
-            name = name_with_suffix[:-4]  # Remove .git suffix
-        else:
-            name = name_with_suffix
-        return owner, name
-    logger.warning(f"Could not parse owner and repo name from URL: {repo_url}")
+    # (optionally with a trailing slash), using plain string operations instead of a regex.
+    # The scheme prefix picks the single form to parse, so each URL is examined once; every
+    # supported form has an owner/name slash, so input without one is rejected before any parsing.
+    if "/" not in repo_url:
+        logger.warning("Could not parse owner and repo name from URL: %s", repo_url)
+        return None, None
+    path = None
+    if repo_url.startswith(("https://", "http://")):
+        host, sep, path = repo_url.partition("://")[2].partition("/")
+        if not host or not sep:
+            path = None
+    elif repo_url.startswith("git@"):
+        host, sep, path = repo_url[4:].partition(":")
+        if not sep or not _is_url_part(host):
+            path = None
+    if path:
+        owner, sep, name = path.removesuffix("/").partition("/")
+        if len(name) > 4 and name.endswith(".git"):
+            name = name[:-4]
+        if sep and _is_url_part(owner) and _is_url_part(name):
+            return owner, name
+    logger.warning("Could not parse owner and repo name from URL: %s", repo_url)
     return None, None
 
+class _GitWorker:
+    """Long-running `git cat-file --batch` process used to read objects from a repository.
+
+    Spawning git for every object read pays fork/exec and repository setup each time;
+    the batch process keeps one git alive per repository and streams requests to it.
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._repository = None
+
+    def repository(self):
+        """Returns a cached pygit2.Repository for this repository, or None if pygit2 is unavailable or it cannot be opened."""
+        if pygit2 is None:
+            return None
+        if self._repository is None:
+            try:
+                self._repository = pygit2.Repository(self.repo_path)
+            except (pygit2.GitError, KeyError):
+                return None
+        return self._repository
+
+    def _ensure_started(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.repo_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def read_object(self, object_spec: str) -> tuple[Optional[str], Optional[bytes]]:
+        """Returns (object_type, content) for an object spec such as 'HEAD:README.md', or (None, None) if missing."""
+        if "\n" in object_spec:
+            raise ValueError("Object spec must not contain newlines")
+        with self._lock:
+            proc = self._ensure_started()
+            try:
+                proc.stdin.write(object_spec.encode("utf-8") + b"\n")
+                proc.stdin.flush()
+                header = proc.stdout.readline()
+                if not header:
+                    raise RuntimeError("git cat-file --batch exited unexpectedly")
+                parts = header.split()
+                # "<spec> missing" / "<spec> ambiguous" responses carry no content
+                if len(parts) != 3 or parts[-1] in (b"missing", b"ambiguous"):
+                    return None, None
+                _, object_type, size = parts
+                content = proc.stdout.read(int(size) + 1)[:-1]  # Content is followed by a LF
+                return object_type.decode("ascii"), content
+            except Exception:
+                self._terminate()
+                raise
+
+    def _terminate(self):
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+    def close(self):
+        self._repository = None
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.stdin.close()
+                try:
+                    self._proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    pass
+            self._terminate()
+
+# One persistent git worker per repository, keyed by the repository's real path
+_git_workers: dict[str, _GitWorker] = {}
+_git_workers_lock = threading.Lock()
+
+def _get_git_worker(repo_path: str) -> _GitWorker:
+    """Returns the persistent git worker for repo_path, creating it on first use."""
+    key = os.path.realpath(repo_path)
+    with _git_workers_lock:
+        worker = _git_workers.get(key)
+        if worker is None:
+            worker = _git_workers[key] = _GitWorker(key)
+        return worker
+
+def _close_git_worker(repo_path: str):
+    """Stops the persistent git worker for repo_path, if one is running."""
+    with _git_workers_lock:
+        worker = _git_workers.pop(os.path.realpath(repo_path), None)
+    if worker:
+        worker.close()
+
+def _close_all_git_workers():
+    with _git_workers_lock:
+        workers = list(_git_workers.values())
+        _git_workers.clear()
+    for worker in workers:
+        worker.close()
+
+atexit.register(_close_all_git_workers)
+
+# Cache of read-only git results, keyed by (repo_path, op_name, args)
+# Entries hold (repo_stamp, created_at, result) and are reused only while the stamp matches
+_git_read_cache: dict[tuple[str, str, tuple], tuple[tuple, float, str]] = {}
+_git_read_cache_lock = threading.Lock()
+GIT_READ_CACHE_TTL = 2.0  # Seconds; bounds staleness from changes the stamp cannot see, such as files created outside this server
+
+def _repo_stamp(repo_path: str) -> tuple:
+    """Returns the mtimes of the git files that change whenever the index, HEAD or branches change."""
+    stamp = []
+    for name in ("index", "HEAD", "packed-refs", os.path.join("refs", "heads")):
+        try:
+            stamp.append(os.stat(os.path.join(repo_path, ".git", name)).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def _cache_probe(repo_path: str, op: str, args: tuple, ttl: float) -> tuple[tuple, tuple, float, Optional[str]]:
+    """Looks up a cached read; returns (key, stamp, now, result) with result None on a miss."""
+    repo_key = os.path.realpath(repo_path)
+    key = (repo_key, op, args)
+    stamp = _repo_stamp(repo_key)
+    now = time.monotonic()
+    with _git_read_cache_lock:
+        entry = _git_read_cache.get(key)
+        if entry and entry[0] == stamp and now - entry[1] < ttl:
+            return key, stamp, now, entry[2]
+    return key, stamp, now, None
+
+def _cache_store(key: tuple, stamp: tuple, now: float, result: str):
+    with _git_read_cache_lock:
+        _git_read_cache[key] = (stamp, now, result)
+
+def _cached(repo_path: str, op: str, args: tuple, fn, ttl: float = GIT_READ_CACHE_TTL):
+    """Returns fn() for a read-only git operation, reusing the cached result while the repository is unchanged."""
+    key, stamp, now, result = _cache_probe(repo_path, op, args, ttl)
+    if result is None:
+        result = fn()  # Errors propagate and are never cached
+        _cache_store(key, stamp, now, result)
+    return result
+
+async def _cached_async(repo_path: str, op: str, args: tuple, fn, ttl: float = GIT_READ_CACHE_TTL):
+    """Like _cached, for an fn returning an awaitable."""
+    key, stamp, now, result = _cache_probe(repo_path, op, args, ttl)
+    if result is None:
+        result = await fn()
+        _cache_store(key, stamp, now, result)
+    return result
+
+def _invalidate_git_read_cache(repo_path: str):
+    """Drops every cached read for repo_path; called after any operation that modifies the repository."""
+    repo_key = os.path.realpath(repo_path)
+    with _git_read_cache_lock:
+        for key in [k for k in _git_read_cache if k[0] == repo_key]:
+            del _git_read_cache[key]
+
+def _fast_rmtree(path: str):
+    """Recursively removes path.
+
+    On POSIX this runs a single `rm -rf`, which walks large trees such as .git/objects in C
+    rather than doing a Python-level lstat/unlink per entry like shutil.rmtree.
+    """
+    if os.name == "posix" and shutil.which("rm"):
+        result = subprocess.run(["rm", "-rf", "--", path], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise OSError(f"rm -rf {path} failed: {result.stderr.strip()}")
+    else:
+        shutil.rmtree(path)
+
+# Removes old clone directories off the request path; the executor's workers are joined at interpreter exit
+_cleanup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="repo-cleanup")
+
+def _log_cleanup_result(path: str, future: Future):
+    if future.exception():
+        logger.warning("Failed to remove previous repository directory %s: %s", path, future.exception())
+    else:
+        logger.info("Successfully removed %s", path)
+
+def _remove_dir_in_background(path: str) -> Future:
+    """Schedules recursive removal of path on the cleanup executor and returns immediately."""
+    future = _cleanup_executor.submit(_fast_rmtree, path)
+    future.add_done_callback(lambda f: _log_cleanup_result(path, f))
+    return future
+
+MMAP_READ_THRESHOLD = 1024 * 1024  # Files larger than this are decoded straight from a memory map
+
+def _read_text_file(path: str) -> str:
+    """Reads a UTF-8 text file with one decode of the raw bytes, memory-mapping large files."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > MMAP_READ_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                content = str(mapped, 'utf-8')
+        else:
+            content = f.read().decode('utf-8')
+    # Keep the universal-newline behaviour of text mode; the check is a cheap scan
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+def _path_in_repo(base_path: str, relative_file_path: str) -> Optional[str]:
+    """Joins relative_file_path onto base_path, or returns None when the result lies outside the repository.
+
+    Absolute paths, '..' components and symlinks are resolved before checking.
+    """
+    full_file_path = os.path.join(base_path, relative_file_path)
+    real_base_path = os.path.realpath(base_path)
+    if os.path.commonpath([real_base_path, os.path.realpath(full_file_path)]) != real_base_path:
+        return None
+    return full_file_path
+
+def _write_text_file(path: str, content: str):
+    """Writes content as UTF-8 with a single encode and raw os.write calls, bypassing the text/buffered IO layers."""
+    data = memoryview(content.encode('utf-8'))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)  # Same default mode as open()
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+# Directories the fallback walk never enters: git metadata plus the usual dependency/cache trees
+_PRUNED_DIRS = frozenset({".git", "node_modules", "__pycache__", ".venv"})
+
+def _scan_dir(path: str) -> tuple[list[str], list[str]]:
+    """Returns the full paths of the files and of the subdirectories to descend into in one directory.
+
+    Each directory is read with a single os.scandir call whose entries already carry their
+    types and their path (built in C), so no per-file stat, join or relpath is needed. Like
+    os.walk, symlinked directories are neither listed as files nor descended into, and a
+    directory that cannot be read (or an entry whose type cannot be determined) is skipped
+    rather than failing the whole walk.
+    """
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if entry.name not in _PRUNED_DIRS and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                else:
+                    files.append(entry.path)
+    except OSError:
+        pass
+    return files, subdirs
+
+def _iter_files(root: str):
+    """Yields the full paths of all files under root, skipping _PRUNED_DIRS; see _relative_paths."""
+    stack = [root]
+    while stack:
+        files, subdirs = _scan_dir(stack.pop())
+        yield from files
+        stack.extend(subdirs)
+
+def _relative_paths(root: str, paths: list[str]) -> list[str]:
+    """Turns paths found under root into '/'-separated paths relative to it by slicing off the root prefix."""
+    cut = len(os.path.join(root, ""))
+    relative = [path[cut:] for path in paths]
+    if os.sep != "/":
+        relative = [path.replace(os.sep, "/") for path in relative]
+    return relative
+
+def _list_subtree(path: str) -> list[str]:
+    return list(_iter_files(path))
+
+def _scan_files(root: str, parallel: bool = True) -> list[str]:
+    """Returns the files under root as relative paths, scanning each top-level subdirectory on its own worker thread.
+
+    os.scandir releases the GIL while reading directories, so subtrees overlap. The threads are
+    started per call, since this walk only runs when git cannot list the files. Trees with fewer
+    than two top-level subdirectories, or parallel=False, are scanned inline.
+    """
+    files, subdirs = _scan_dir(root)
+    if not parallel or len(subdirs) < 2:
+        for path in subdirs:
+            files.extend(_iter_files(path))
+    else:
+        with ThreadPoolExecutor(max_workers=min(8, len(subdirs)), thread_name_prefix="file-scan") as pool:
+            for future in as_completed([pool.submit(_list_subtree, path) for path in subdirs]):
+                files.extend(future.result())
+    return _relative_paths(root, files)
+
+def _git_stdout(repo_path: str, cmd: list[str]) -> str:
+    """Runs a git command in repo_path and returns its stdout, raising CalledProcessError on failure.
+
+    Output is captured as bytes and decoded once, skipping text mode's extra newline-translation
+    pass over potentially large diffs and logs.
+    """
+    result = subprocess.run(cmd, cwd=repo_path, capture_output=True)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(
+            result.returncode, cmd,
+            output=result.stdout.decode("utf-8", errors="replace"),
+            stderr=result.stderr.decode("utf-8", errors="replace"),
+        )
+    return result.stdout.decode("utf-8", errors="replace")
+
+async def _git_stdout_async(repo_path: str, cmd: list[str]) -> str:
+    """Async counterpart of _git_stdout, letting the event loop serve other tool calls while git runs."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=repo_path, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, cmd,
+            output=stdout.decode("utf-8", errors="replace"),
+            stderr=stderr.decode("utf-8", errors="replace"),
+        )
+    return stdout.decode("utf-8", errors="replace")
+
+async def _current_branch(repo_path: str) -> str:
+    """Equivalent of `git rev-parse --abbrev-ref HEAD`, answered from .git/HEAD when it names a branch."""
+    try:
+        with open(os.path.join(repo_path, ".git", "HEAD"), encoding="utf-8") as f:
+            head = f.read().strip()
+        if head.startswith("ref: refs/heads/"):
+            return head[len("ref: refs/heads/"):]
+    except OSError:
+        pass  # Subdirectory, linked worktree (.git file) or not a repository
+    return (await _git_stdout_async(repo_path, ["git", "rev-parse", "--abbrev-ref", "HEAD"])).strip()
+
+async def _git_read(repo_path: str, libgit2_fn, cmd: list[str]) -> str:
+    """Produces the output of a read-only git command in-process via pygit2, falling back to the git CLI.
+
+    The CLI also runs whenever libgit2 cannot answer (e.g. revision ranges, unborn HEAD),
+    so callers keep seeing git's own error messages.
+    """
+    repo = _get_git_worker(repo_path).repository()
+    if repo is not None:
+        try:
+            return libgit2_fn(repo)
+        except (pygit2.GitError, KeyError, ValueError):
+            pass
+    return await _git_stdout_async(repo_path, cmd)
+
+def _abbrev_length(repo) -> int:
+    """The length git abbreviates object names to with the default core.abbrev=auto.
+
+    git grows it with the number of packed objects: half the bit length of the count, rounded
+    up, and at least 7. Layouts whose count this cannot read cheaply raise ValueError so the
+    caller falls back to the git CLI.
+    """
+    config = repo.config
+    if "core.abbrev" in config and config["core.abbrev"] != "auto":
+        raise ValueError("core.abbrev is configured")
+    objects_dir = os.path.join(repo.path, "objects")
+    if os.path.exists(os.path.join(objects_dir, "info", "alternates")):
+        raise ValueError("alternate object stores are counted by the git CLI")
+    pack_dir = os.path.join(objects_dir, "pack")
+    try:
+        names = os.listdir(pack_dir)
+    except FileNotFoundError:
+        names = []
+    if "multi-pack-index" in names:
+        raise ValueError("multi-pack-index is counted by the git CLI")
+    count = 0
+    for name in names:
+        if name.endswith(".idx"):
+            with open(os.path.join(pack_dir, name), "rb") as f:
+                header = f.read(8 + 256 * 4)
+            # Version 2 indexes start with a magic and version; the last fan-out entry is the object count
+            fanout = header[8:] if header.startswith(b"\377tOc") else header[:256 * 4]
+            count += int.from_bytes(fanout[-4:], "big")
+    return max(7, (count.bit_length() + 1) // 2)
+
+def _short_id(commit, length: int) -> str:
+    """commit's abbreviated hash: at least length characters, and longer if needed to be unique."""
+    short_id = commit.short_id
+    return short_id if len(short_id) >= length else str(commit.id)[:length]
+
+def _commit_subject(commit) -> str:
+    """First paragraph of a commit message joined onto one line, as `git log --oneline` shows it.
+
+    Like git, leading blank lines are skipped and each line loses only its trailing whitespace;
+    spacing inside a line is kept.
+    """
+    lines = []
+    for line in commit.message.split("\n"):
+        line = line.rstrip()
+        if line:
+            lines.append(line)
+        elif lines:
+            break
+    return " ".join(lines)
+
+def _branch_subject(commit) -> str:
+    """Commit subject as `git branch -v` shows it (ref-filter's %(contents:subject)).
+
+    Unlike the oneline format, only empty lines count as blank: the subject runs to the first "\\n\\n"
+    and its newlines become spaces with all other whitespace kept.
+    """
+    subject = commit.message.lstrip("\n").split("\n\n", 1)[0].rstrip("\r\n")
+    return subject.replace("\r\n", " ").replace("\n", " ")
+
+def _libgit2_branches(repo, remote: bool) -> str:
+    """Equivalent of `git branch -v`, or `git branch -v -a` when remote is True."""
+    if repo.head_is_detached:
+        # git names the ref or commit that was checked out, read back from the reflog
+        raise ValueError("detached HEAD is described by the git CLI")
+    abbrev = _abbrev_length(repo)
+    rows = []
+    for name in sorted(repo.branches.local):
+        branch = repo.branches.local[name]
+        rows.append((branch.is_head(), name, branch.target, _tracking_info(repo, branch)))
+    if remote:
+        for name in sorted(repo.branches.remote):
+            branch = repo.branches.remote[name]
+            rows.append((False, f"remotes/{name}", branch.target, ""))
+    width = max((len(row[1]) for row in rows), default=0)
+    lines = []
+    for is_head, name, target, tracking in rows:
+        marker = "*" if is_head else " "
+        if isinstance(target, str):  # Symbolic ref such as origin/HEAD
+            lines.append(f"{marker} {name:<{width}} -> {target.removeprefix('refs/remotes/')}")
+        else:
+            commit = repo[target].peel(pygit2.Commit)
+            lines.append(f"{marker} {name:<{width}} {_short_id(commit, abbrev)} {tracking}{_branch_subject(commit)}")
+    return "\n".join(lines)
+
+def _tracking_info(repo, branch) -> str:
+    """The "[ahead N, behind M] " annotation `git branch -v` shows for branches with an upstream."""
+    try:
+        upstream_name = branch.upstream_name
+    except (pygit2.GitError, KeyError, ValueError):
+        return ""  # No upstream configured
+    # The upstream may be a remote-tracking branch or, with `--track` on a local base, refs/heads/...
+    upstream_ref = repo.references.get(upstream_name)
+    if upstream_ref is None:
+        return "[gone] "
+    ahead, behind = repo.ahead_behind(branch.target, upstream_ref.resolve().target)
+    parts = ([f"ahead {ahead}"] if ahead else []) + ([f"behind {behind}"] if behind else [])
+    return f"[{', '.join(parts)}] " if parts else ""
+
+def _libgit2_log(repo, branch: Optional[str], limit: int) -> str:
+    """Equivalent of `git log --max-count=<limit> --oneline [<branch>]`."""
+    start = repo.revparse_single(branch).peel(pygit2.Commit) if branch else repo.head.peel(pygit2.Commit)
+    abbrev = _abbrev_length(repo)
+    # Topological order keeps children ahead of parents when commit timestamps tie, as git log does
+    commits = repo.walk(start.id, pygit2.GIT_SORT_TOPOLOGICAL | pygit2.GIT_SORT_TIME)
+    if limit >= 0:
+        commits = itertools.islice(commits, limit)
+    return "\n".join(f"{_short_id(c, abbrev)} {_commit_subject(c)}" for c in commits)
+
+def _libgit2_diff(repo) -> str:
+    """Equivalent of `git diff`: unstaged changes, index to working tree.
+
+    Diffs against a commit stay with the git CLI, whose rename detection and similarity
+    scores libgit2 does not reproduce.
+    """
+    index = repo.index
+    index.read(False)  # The cached handle may predate index writes made by the git CLI
+    return repo.diff().patch or ""
+
+def _libgit2_ls_files(repo) -> list[str]:
+    """Equivalent of `git ls-files --cached --others --exclude-standard`: the index paths, then the untracked paths.
+
+    Index paths deleted from the working tree are left out, since they can no longer be read.
+    Each part is in path order, like git's own output.
+    """
+    index = repo.index
+    index.read(False)
+    status = repo.status(untracked_files="all")
+    paths = [entry.path for entry in index if not status.get(entry.path, 0) & pygit2.GIT_STATUS_WT_DELETED]
+    paths.extend(sorted(path for path, flags in status.items() if flags & pygit2.GIT_STATUS_WT_NEW))
+    return paths
+
+def _repo_file_list(repo_path: str) -> list[str]:
+    """Lists tracked and untracked-but-not-ignored files as two sorted runs, reading the index in-process when pygit2 is available.
+
+    Tracked files deleted from the working tree are not listed.
+
+    Raises CalledProcessError (or FileNotFoundError) when repo_path is not a git work tree.
+    """
+    repo = _get_git_worker(repo_path).repository()
+    # pygit2 discovers enclosing repositories; only use it when repo_path is the work tree root
+    if repo is not None and repo.workdir and os.path.realpath(repo.workdir) == os.path.realpath(repo_path):
+        try:
+            return _libgit2_ls_files(repo)
+        except (pygit2.GitError, KeyError, ValueError):
+            pass
+    output = _git_stdout(repo_path, ["git", "ls-files", "--cached", "--others", "--exclude-standard", "-z"])
+    if not output:
+        return []
+    deleted = _git_stdout(repo_path, ["git", "ls-files", "--deleted", "-z"])
+    deleted_paths = set(deleted.rstrip("\0").split("\0")) if deleted else set()
+    return [path for path in output.rstrip("\0").split("\0") if path not in deleted_paths]
+
+def _libgit2_create_branch(repo, branch_name: str, base_branch: Optional[str]) -> bool:
+    """Equivalent of `git checkout -b <branch_name> [<base_branch>]`; returns False when the git CLI should handle it.
+
+    Only branches starting at the current commit are created here, which just moves HEAD. Starting
+    elsewhere means updating the working tree while carrying local changes over, which is left to git.
+    """
+    if repo is None:
+        return False
+    try:
+        base = repo.revparse_single(base_branch or "HEAD").peel(pygit2.Commit)
+        if repo.head_is_unborn or repo.head.target != base.id:
+            return False
+        branch = repo.branches.local.create(branch_name, base)
+    except (pygit2.GitError, KeyError, ValueError):
+        return False
+    try:
+        # Like branch.autoSetupMerge, track the start point when it is a remote-tracking branch
+        if base_branch and base_branch in repo.branches.remote:
+            branch.upstream = repo.branches.remote[base_branch]
+        repo.set_head(branch.name)
+    except (pygit2.GitError, KeyError, ValueError):
+        branch.delete()
+        return False
+    return True
+
+_COMMIT_HOOKS = ("pre-commit", "prepare-commit-msg", "commit-msg", "post-commit")
+# Identity overrides git reads from the environment but libgit2's default signature ignores
+_IDENTITY_ENV_VARS = ("GIT_AUTHOR_NAME", "GIT_AUTHOR_EMAIL", "GIT_AUTHOR_DATE", "GIT_COMMITTER_NAME", "GIT_COMMITTER_EMAIL", "GIT_COMMITTER_DATE")
+
+def _clean_commit_message(message: str) -> str:
+    """Applies `git commit -m`'s whitespace cleanup: trailing whitespace is stripped from every line,
+    runs of blank lines collapse to one, and leading/trailing blank lines are dropped."""
+    lines = []
+    for line in message.split("\n"):
+        line = line.rstrip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines) + "\n"
+
+def _libgit2_commit(repo, commit_message: str) -> Optional[bool]:
+    """Equivalent of `git add . && git commit -m <commit_message>` from the repository root.
+
+    Returns True if a commit was created, False if there was nothing to commit, and None when
+    the git CLI should handle it (no pygit2, commit hooks, signing or external filter drivers
+    configured, identity set through the environment, empty message).
+    """
+    if repo is None or not commit_message.strip() or any(var in os.environ for var in _IDENTITY_ENV_VARS):
+        return None
+    try:
+        config = repo.config
+        if "core.hooksPath" in config or ("commit.gpgsign" in config and config.get_bool("commit.gpgsign")):
+            return None
+        # libgit2 does not run external clean filters (e.g. Git LFS), so staging would store the raw content
+        if any(entry.name.startswith("filter.") and entry.name.endswith((".clean", ".process")) for entry in config):
+            return None
+        if any(os.access(os.path.join(repo.path, "hooks", hook), os.X_OK) for hook in _COMMIT_HOOKS):
+            return None
+        signature = repo.default_signature
+        index = repo.index
+        index.read(False)
+        index.add_all()
+        index.write()
+        tree_id = index.write_tree()
+        if repo.head_is_unborn:
+            if not len(index):
+                return False
+            parents = []
+        else:
+            head = repo.head.peel(pygit2.Commit)
+            if head.tree_id == tree_id:
+                return False
+            parents = [head.id]
+        repo.create_commit("HEAD", signature, signature, _clean_commit_message(commit_message), tree_id, parents)
+        return True
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
+
 @mcp.tool(
     name="get_git_status",
     description="Get the current git status of the repository",
 )
-def get_git_status(
+async def get_git_status(
     ctx: Context,
     repo_path: Annotated[Optional[str], "Path to the git repository (optional, defaults to current directory)"] = ".",
 ) -> str:
     """Get the current git status of the repository."""
     try:
-        result = subprocess.run(
-            ["git", "status", "--porcelain"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        # Not cached: the stamp cannot see working tree edits made outside these tools
+        # Always the CLI: libgit2's status has no rename detection and does not quote paths as git does
+        output = await _git_stdout_async(repo_path, ["git", "status", "--porcelain"])
         
-        ctx.info(f"Getting git status for {repo_path}")
+        await _ctx_log(ctx, "info", "Getting git status for %s", repo_path)
         
-        if result.returncode == 0:
-            status_output = result.stdout.strip()
-            if not status_output:
-                return "Repository is clean - no changes detected."
-            else:
-                return f"Git Status:\n{status_output}"
+        status_output = output.strip()
+        if not status_output:
+            return "Repository is clean - no changes detected."
         else:
-            return f"Error getting git status: {result.stderr}"
+            return f"Git Status:\n{status_output}"
             
     except subprocess.CalledProcessError as e:
         error_msg = f"Error running git status: {e.stderr if e.stderr else str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"Error: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
 
 
@@ -159,7 +803,7 @@ def get_git_status(
     name="list_branches",
     description="List all branches in the repository",
 )
-def list_branches(
+async def list_branches(
     ctx: Context,
     repo_path: Annotated[Optional[str], "Path to the git repository (optional, defaults to current directory)"] = ".",
     remote: Annotated[bool, "Include remote branches"] = False,
@@ -170,29 +814,22 @@ def list_branches(
         if remote:
             cmd.append("-a")
             
-        result = subprocess.run(
-            cmd,
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        output = await _cached_async(repo_path, "branch", (remote,), lambda: _git_read(
+            repo_path, lambda repo: _libgit2_branches(repo, remote), cmd
+        ))
         
-        ctx.info(f"Listing branches for {repo_path} (remote: {remote})")
+        await _ctx_log(ctx, "info", "Listing branches for %s (remote: %s)", repo_path, remote)
         
-        if result.returncode == 0:
-            branches = result.stdout.strip()
-            return f"Branches:\n{branches}"
-        else:
-            return f"Error listing branches: {result.stderr}"
+        branches = output.strip()
+        return f"Branches:\n{branches}"
             
     except subprocess.CalledProcessError as e:
         error_msg = f"Error running git branch: {e.stderr if e.stderr else str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"Error: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
 
 
@@ -200,7 +837,7 @@ def list_branches(
     name="create_pr_summary",
     description="Create a summary for a pull request based on git diff",
 )
-def create_pr_summary(
+async def create_pr_summary(
     base_branch: Annotated[str, "Base branch to compare against"],
     ctx: Context,
     head_branch: Annotated[Optional[str], "Head branch (optional, defaults to current branch)"] = None,
@@ -210,42 +847,24 @@ def create_pr_summary(
     try:
         # Get current branch if head_branch not specified
         if not head_branch:
-            result = subprocess.run(
-                ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            head_branch = result.stdout.strip()
-        
-        ctx.info(f"Creating PR summary: {head_branch} -> {base_branch}")
+            head_branch = await _current_branch(repo_path)
         
-        # Get diff between branches
-        result = subprocess.run(
-            ["git", "diff", f"{base_branch}...{head_branch}", "--stat"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        await _ctx_log(ctx, "info", "Creating PR summary: %s -> %s", head_branch, base_branch)
         
-        if result.returncode == 0:
-            diff_stat = result.stdout.strip()
-            if not diff_stat:
-                return f"No differences found between {base_branch} and {head_branch}"
-            else:
-                return f"PR Summary ({head_branch} -> {base_branch}):\n\nChanges:\n{diff_stat}"
+        # Get diff between branches; only trailing whitespace is trimmed since --stat lines start with a space
+        diff_stat = (await _git_stdout_async(repo_path, ["git", "diff", f"{base_branch}...{head_branch}", "--stat"])).rstrip()
+        if not diff_stat:
+            return f"No differences found between {base_branch} and {head_branch}"
         else:
-            return f"Error creating PR summary: {result.stderr}"
+            return f"PR Summary ({head_branch} -> {base_branch}):\n\nChanges:\n{diff_stat}"
             
     except subprocess.CalledProcessError as e:
         error_msg = f"Error creating PR summary: {e.stderr if e.stderr else str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"Error: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
 
 
@@ -253,7 +872,7 @@ def create_pr_summary(
     name="get_commit_history",
     description="Get commit history for a branch or between branches",
 )
-def get_commit_history(
+async def get_commit_history(
     ctx: Context,
     branch: Annotated[Optional[str], "Branch name (optional, defaults to current branch)"] = None,
     limit: Annotated[int, "Maximum number of commits to return"] = 10,
@@ -265,33 +884,26 @@ def get_commit_history(
         if branch:
             cmd.append(branch)
             
-        result = subprocess.run(
-            cmd,
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        output = await _cached_async(repo_path, "log", (branch, limit), lambda: _git_read(
+            repo_path, lambda repo: _libgit2_log(repo, branch, limit), cmd
+        ))
         
         branch_info = f" for branch '{branch}'" if branch else ""
-        ctx.info(f"Getting commit history{branch_info} (limit: {limit})")
+        await _ctx_log(ctx, "info", "Getting commit history%s (limit: %s)", branch_info, limit)
         
-        if result.returncode == 0:
-            commits = result.stdout.strip()
-            if not commits:
-                return "No commits found"
-            else:
-                return f"Recent commits{branch_info}:\n{commits}"
+        commits = output.rstrip()
+        if not commits:
+            return "No commits found"
         else:
-            return f"Error getting commit history: {result.stderr}"
+            return f"Recent commits{branch_info}:\n{commits}"
             
     except subprocess.CalledProcessError as e:
         error_msg = f"Error getting commit history: {e.stderr if e.stderr else str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"Error: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
 
 
@@ -299,7 +911,7 @@ def get_commit_history(
     name="get_git_diff",
     description="Get git diff between commits, branches, or working directory",
 )
-def get_git_diff(
+async def get_git_diff(
     ctx: Context,
     target: Annotated[Optional[str], "Target to diff against (commit hash, branch name, etc.). Defaults to working directory vs HEAD"] = None,
     repo_path: Annotated[Optional[str], "Path to the git repository (optional, defaults to current directory)"] = ".",
@@ -310,71 +922,69 @@ def get_git_diff(
         if target:
             cmd.append(target)
             
-        result = subprocess.run(
-            cmd,
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        # Not cached: every diff includes the working tree, which the cache stamp does not cover
+        if target:
+            output = await _git_stdout_async(repo_path, cmd)
+        else:
+            output = await _git_read(repo_path, _libgit2_diff, cmd)
         
         diff_target = f" against {target}" if target else " (working directory vs HEAD)"
-        ctx.info(f"Getting git diff{diff_target}")
+        await _ctx_log(ctx, "info", "Getting git diff%s", diff_target)
         
-        if result.returncode == 0:
-            diff_output = result.stdout.strip()
-            if not diff_output:
-                return f"No differences found{diff_target}"
-            else:
-                return f"Git Diff{diff_target}:\n{diff_output}"
+        diff_output = output.rstrip()
+        if not diff_output:
+            return f"No differences found{diff_target}"
         else:
-            return f"Error getting git diff: {result.stderr}"
+            return f"Git Diff{diff_target}:\n{diff_output}"
             
     except subprocess.CalledProcessError as e:
         error_msg = f"Error running git diff: {e.stderr if e.stderr else str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"Error: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
 
 
 @mcp.tool(
     name="clone_repository",
-    description="Clones a GitHub repository into a new temporary local directory, cleans up any previous one, saves state, and sets it as the active repository. Parses owner/name from URL.",
+    description="Clones a GitHub repository into a new temporary local directory, cleans up any previous one, saves state, and sets it as the active repository. Parses owner/name from URL. By default only the latest commit of the default branch is fetched; set full_history for the complete history.",
 )
-def clone_repository(
+async def clone_repository(
     ctx: Context,
     repo_url: Annotated[str, "The URL of the GitHub repository (e.g., https://github.com/user/repo.git)"],
+    full_history: Annotated[bool, "Clone the full history of all branches instead of a shallow, single-branch clone (needed for commit history or diffs against other branches)"] = False,
 ) -> str:
     """Clones a GitHub repository to a new temporary directory, cleans up old, saves state, and sets as active."""
     global active_repo_details
+    had_previous = bool(active_repo_details["path"])
     
     # Clean up previous active repository's directory if it exists
     if active_repo_details["path"] and os.path.exists(active_repo_details["path"]):
         previous_repo_path = active_repo_details["path"]
-        ctx.info(f"Cleaning up previous active repository directory: {previous_repo_path}")
-        try:
-            shutil.rmtree(previous_repo_path)
-            ctx.info(f"Successfully removed {previous_repo_path}")
-        except Exception as e:
-            ctx.warning(f"Failed to remove previous repository directory {previous_repo_path}: {str(e)}")
-            # Decide if this should be a fatal error or just a warning. For now, warning.
+        await _ctx_log(ctx, "info", "Cleaning up previous active repository directory: %s", previous_repo_path)
+        _close_git_worker(previous_repo_path)
+        _invalidate_git_read_cache(previous_repo_path)
+        # The new clone goes to a fresh temporary directory, so it does not need to wait for this
+        _remove_dir_in_background(previous_repo_path)
 
-    # Reset active_repo_details before attempting a new clone and save this cleared state
+    # Reset active_repo_details before attempting a new clone; it is saved once the clone finishes
     active_repo_details = {"path": None, "url": None, "owner": None, "name": None}
-    _save_state()
     temp_dir = None
 
     try:
         # Create a new temporary directory for the clone
         temp_dir = tempfile.mkdtemp(prefix="mcp_clone_")
-        ctx.info(f"Created new temporary directory for clone: {temp_dir}")
+        await _ctx_log(ctx, "info", "Created new temporary directory for clone: %s", temp_dir)
 
-        cmd = ["git", "clone", repo_url, temp_dir]
+        if full_history:
+            cmd = ["git", "clone", repo_url, temp_dir]
+        else:
+            # Shallow, partial clone: blobs outside the checkout are fetched on demand by git
+            cmd = ["git", "clone", "--depth=1", "--filter=blob:none", "--single-branch", repo_url, temp_dir]
         
-        ctx.info(f"Cloning repository {repo_url} to {temp_dir}")
+        await _ctx_log(ctx, "info", "Cloning repository %s to %s", repo_url, temp_dir)
         
         result = subprocess.run(
             cmd,
@@ -396,44 +1006,48 @@ def clone_repository(
                 msg += f" Parsed owner: '{owner}', name: '{name}'."
             else:
                 msg += " Could not parse owner/name from URL for GitHub operations."
-            ctx.info(msg)
+            await _ctx_log(ctx, "info", msg)
             return msg
         else:
             if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+                _fast_rmtree(temp_dir)
             return f"Error cloning repository: {result.stderr}"
 
     except subprocess.CalledProcessError as e:
         error_msg = f"Error cloning repository {repo_url}: {e.stderr if e.stderr else str(e)}"
         if temp_dir and os.path.exists(temp_dir):
             try:
-                shutil.rmtree(temp_dir)
-                ctx.info(f"Cleaned up temporary directory {temp_dir} after failed clone.")
+                _fast_rmtree(temp_dir)
+                await _ctx_log(ctx, "info", "Cleaned up temporary directory %s after failed clone.", temp_dir)
             except Exception as cleanup_e:
-                ctx.warning(f"Failed to cleanup temporary directory {temp_dir} after failed clone: {str(cleanup_e)}")
-        ctx.error(error_msg)
+                await _ctx_log(ctx, "warning", "Failed to cleanup temporary directory %s after failed clone: %s", temp_dir, cleanup_e)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except FileNotFoundError:
         error_msg = "Error: Git command not found. Please ensure Git is installed and in your PATH."
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"An unexpected error occurred during clone: {str(e)}"
         if temp_dir and os.path.exists(temp_dir):
             try:
-                shutil.rmtree(temp_dir)
-                ctx.info(f"Cleaned up temporary directory {temp_dir} after unexpected error during clone.")
+                _fast_rmtree(temp_dir)
+                await _ctx_log(ctx, "info", "Cleaned up temporary directory %s after unexpected error during clone.", temp_dir)
             except Exception as cleanup_e:
-                ctx.warning(f"Failed to cleanup temporary directory {temp_dir} after unexpected error: {str(cleanup_e)}")
-        ctx.error(error_msg)
+                await _ctx_log(ctx, "warning", "Failed to cleanup temporary directory %s after unexpected error: %s", temp_dir, cleanup_e)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
+    finally:
+        # A failed clone still has to persist the cleared state if it replaced a previous repository
+        if had_previous and not active_repo_details["path"]:
+            _save_state()
 
 
 @mcp.tool(
     name="create_git_branch",
     description="Creates a new branch in the active local git repository.",
 )
-def create_git_branch(
+async def create_git_branch(
     ctx: Context,
     branch_name: Annotated[str, "The name of the new branch to create"],
     base_branch: Annotated[Optional[str], "The base branch to create the new branch from (optional, defaults to current HEAD)"] = None,
@@ -450,8 +1064,11 @@ def create_git_branch(
         if base_branch:
             cmd.append(base_branch)
         
-        ctx.info(f"Creating new branch '{branch_name}' from '{base_branch if base_branch else 'current HEAD'}' in active repo {repo_path}")
+        await _ctx_log(ctx, "info", "Creating new branch '%s' from '%s' in active repo %s", branch_name, base_branch if base_branch else "current HEAD", repo_path)
         
+        if _libgit2_create_branch(_get_git_worker(repo_path).repository(), branch_name, base_branch):
+            return f"Branch '{branch_name}' created successfully and checked out from '{base_branch if base_branch else 'current HEAD'}' in {repo_path}."
+
         result = subprocess.run(
             cmd,
             cwd=repo_path,
@@ -467,23 +1084,25 @@ def create_git_branch(
 
     except subprocess.CalledProcessError as e:
         error_msg = f"Error creating branch '{branch_name}': {e.stderr if e.stderr else str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except FileNotFoundError:
         error_msg = "Error: Git command not found. Please ensure Git is installed and in your PATH."
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"An unexpected error occurred: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg 
+    finally:
+        _invalidate_git_read_cache(repo_path)
 
 
 @mcp.tool(
     name="git_commit_changes",
     description="Stages all changes (git add .) and commits them with a given message in the active repository.",
 )
-def git_commit_changes(
+async def git_commit_changes(
     ctx: Context,
     commit_message: Annotated[str, "The commit message"],
 ) -> str:
@@ -495,8 +1114,15 @@ def git_commit_changes(
     repo_path = active_repo_details["path"]
 
     try:
+        committed = _libgit2_commit(_get_git_worker(repo_path).repository(), commit_message)
+        if committed is not None:
+            if not committed:
+                return f"No changes to commit in active repo ({repo_path}). Working tree clean."
+            await _ctx_log(ctx, "info", "Committed all changes in active repo (%s) with message: '%s'", repo_path, commit_message)
+            return f"Changes committed successfully in active repo ({repo_path}) with message: '{commit_message}'."
+
         # Stage all changes
-        ctx.info(f"Staging all changes in active repo: {repo_path}")
+        await _ctx_log(ctx, "info", "Staging all changes in active repo: %s", repo_path)
         add_cmd = ["git", "add", "."]
         add_result = subprocess.run(
             add_cmd,
@@ -508,11 +1134,11 @@ def git_commit_changes(
         if add_result.returncode != 0:
             # This typically won't be hit with check=True, but kept for robustness
             error_msg = f"Error staging changes in {repo_path}: {add_result.stderr}"
-            ctx.error(error_msg)
+            await _ctx_log(ctx, "error", error_msg)
             return error_msg
 
         # Commit changes
-        ctx.info(f"Committing changes in active repo ({repo_path}) with message: '{commit_message}'")
+        await _ctx_log(ctx, "info", "Committing changes in active repo (%s) with message: '%s'", repo_path, commit_message)
         commit_cmd = ["git", "commit", "-m", commit_message]
         commit_result = subprocess.run(
             commit_cmd,
@@ -541,23 +1167,25 @@ def git_commit_changes(
            "no changes added to commit" in output or "no changes added to commit" in err_output:
             return f"No changes to commit in active repo ({repo_path}). Working tree clean."
         error_msg = f"Error during git operation in active repo ({repo_path}): {err_output if err_output else output if output else str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except FileNotFoundError:
         error_msg = "Error: Git command not found. Please ensure Git is installed and in your PATH."
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"An unexpected error occurred: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg 
+    finally:
+        _invalidate_git_read_cache(repo_path)
 
 
 @mcp.tool(
     name="git_push_branch",
     description="Pushes a local branch from the active repository to the remote (origin).",
 )
-def git_push_branch(
+async def git_push_branch(
     ctx: Context,
     branch_name: Annotated[str, "The name of the local branch to push"],
     set_upstream: Annotated[bool, "Set the upstream for the branch (git push -u origin <branch_name>)"] = True,
@@ -576,7 +1204,7 @@ def git_push_branch(
         else:
             cmd.extend(["origin", branch_name])
         
-        ctx.info(f"Pushing branch '{branch_name}' to origin from active repo {repo_path} (set_upstream: {set_upstream})")
+        await _ctx_log(ctx, "info", "Pushing branch '%s' to origin from active repo %s (set_upstream: %s)", branch_name, repo_path, set_upstream)
         
         result = subprocess.run(
             cmd,
@@ -601,23 +1229,25 @@ def git_push_branch(
 
     except subprocess.CalledProcessError as e:
         error_msg = f"Error pushing branch '{branch_name}' in active repo ({repo_path}): {e.stderr if e.stderr else e.stdout if e.stdout else str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except FileNotFoundError:
         error_msg = "Error: Git command not found. Please ensure Git is installed and in your PATH."
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"An unexpected error occurred: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg 
+    finally:
+        _invalidate_git_read_cache(repo_path)
 
 
 @mcp.tool(
     name="create_github_pr",
     description="Creates a pull request on GitHub for the active repository using PyGithub.",
 )
-def create_github_pr(
+async def create_github_pr(
     ctx: Context,
     title: Annotated[str, "The title of the pull request"],
     body: Annotated[str, "The body/description of the pull request"],
@@ -638,9 +1268,9 @@ def create_github_pr(
     
     try:
         repo_full_name = f"{owner}/{repo_name}"
-        ctx.info(f"Attempting to create GitHub PR for active repo {repo_full_name}: '{head_branch}' -> '{base_branch}' with title '{title}'")
+        await _ctx_log(ctx, "info", "Attempting to create GitHub PR for active repo %s: '%s' -> '%s' with title '%s'", repo_full_name, head_branch, base_branch, title)
 
-        gh_repo = g.get_repo(repo_full_name)
+        gh_repo = _get_gh_repo(repo_full_name)
         
         pull_request = gh_repo.create_pull(
             title=title,
@@ -651,7 +1281,7 @@ def create_github_pr(
             # maintainer_can_modify=True, # Optional
         )
         
-        ctx.info(f"Successfully created PR: {pull_request.html_url}")
+        await _ctx_log(ctx, "info", "Successfully created PR: %s", pull_request.html_url)
         return f"Successfully created PR: {pull_request.html_url}"
 
     except Exception as e:
@@ -666,7 +1296,7 @@ def create_github_pr(
         elif hasattr(e, 'status'):
              error_msg += f" - Status: {e.status}"
         
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg 
 
 
@@ -674,52 +1304,110 @@ def create_github_pr(
     name="read_file_in_repo",
     description="Reads the content of a specified file within the active repository.",
 )
-def read_file_in_repo(
+async def read_file_in_repo(
     ctx: Context,
     relative_file_path: Annotated[str, "The path of the file relative to the active repository root (e.g., src/my_module.py)"],
+    ref: Annotated[Optional[str], "Git revision to read the file from (e.g., HEAD, main, a commit hash). Defaults to the working tree"] = None,
 ) -> str:
-    """Reads the content of a specified file in the active repo."""
+    """Reads the content of a specified file in the active repo, from the working tree or a given revision."""
     global active_repo_details
     if not active_repo_details["path"]:
         return "Error: No active repository. Please clone a repository first using 'clone_repository'."
 
     base_path = active_repo_details["path"]
-    full_file_path = os.path.join(base_path, relative_file_path)
+    full_file_path = _path_in_repo(base_path, relative_file_path)
+    if full_file_path is None:
+        outside_msg = f"Error: Path is outside the active repository: {relative_file_path}"
+        await _ctx_log(ctx, "warning", outside_msg)
+        return outside_msg
+
+    if ref:
+        object_spec = f"{ref}:{relative_file_path}"
+        try:
+            await _ctx_log(ctx, "info", "Attempting to read %s in active repo: %s", object_spec, base_path)
+            object_type, data = _get_git_worker(base_path).read_object(object_spec)
+            if object_type is None:
+                not_found_msg = f"Error: File not found at {object_spec}"
+                await _ctx_log(ctx, "warning", not_found_msg)
+                return not_found_msg
+            if object_type != "blob":
+                not_file_msg = f"Error: Path exists but is not a file: {object_spec}"
+                await _ctx_log(ctx, "warning", not_file_msg)
+                return not_file_msg
+            await _ctx_log(ctx, "info", "Successfully read content from %s", object_spec)
+            return data.decode("utf-8")
+        except Exception as e:
+            error_msg = f"Error reading file {object_spec} in active repo: {str(e)}"
+            await _ctx_log(ctx, "error", error_msg)
+            return error_msg
 
     try:
-        ctx.info(f"Attempting to read file in active repo: {full_file_path}")
+        await _ctx_log(ctx, "info", "Attempting to read file in active repo: %s", full_file_path)
         
-        if not os.path.exists(full_file_path):
+        # Let open() report missing paths and directories instead of stat-ing first
+        try:
+            content = _read_text_file(full_file_path)
+        except FileNotFoundError:
             not_found_msg = f"Error: File not found at {full_file_path}"
-            ctx.warning(not_found_msg)
+            await _ctx_log(ctx, "warning", not_found_msg)
             return not_found_msg
-            
-        if not os.path.isfile(full_file_path):
+        except IsADirectoryError:
             not_file_msg = f"Error: Path exists but is not a file: {full_file_path}"
-            ctx.warning(not_file_msg)
+            await _ctx_log(ctx, "warning", not_file_msg)
             return not_file_msg
 
-        with open(full_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
         success_msg = f"Successfully read content from {full_file_path}"
         # Optionally, log a snippet of the content for very small files, or just its length
         # For now, just log success and return the full content.
         # ctx.info(success_msg + f" (length: {len(content)})") 
-        ctx.info(success_msg)
+        await _ctx_log(ctx, "info", success_msg)
         return content
 
     except Exception as e:
         error_msg = f"Error reading file {full_file_path} in active repo: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg
 
 
+@mcp.tool(
+    name="read_files_in_repo",
+    description="Reads the contents of several files within the active repository in one call. Each file's content is preceded by a '==> path <==' header.",
+)
+async def read_files_in_repo(
+    ctx: Context,
+    relative_file_paths: Annotated[list[str], "The paths of the files relative to the active repository root (e.g., ['README.md', 'src/my_module.py'])"],
+) -> str:
+    """Reads several files in the active repo, saving a tool round-trip per file."""
+    global active_repo_details
+    if not active_repo_details["path"]:
+        return "Error: No active repository. Please clone a repository first using 'clone_repository'."
+
+    base_path = active_repo_details["path"]
+    await _ctx_log(ctx, "info", "Reading %s files in active repo: %s", len(relative_file_paths), base_path)
+
+    sections = []
+    for relative_file_path in relative_file_paths:
+        full_file_path = _path_in_repo(base_path, relative_file_path)
+        try:
+            if full_file_path is None:
+                content = f"Error: Path is outside the active repository: {relative_file_path}"
+            else:
+                content = _read_text_file(full_file_path)
+        except FileNotFoundError:
+            content = f"Error: File not found at {full_file_path}"
+        except IsADirectoryError:
+            content = f"Error: Path exists but is not a file: {full_file_path}"
+        except Exception as e:
+            content = f"Error reading file {full_file_path} in active repo: {str(e)}"
+        sections.append(f"==> {relative_file_path} <==\n{content}")
+    return "\n\n".join(sections)
+
+
 @mcp.tool(
     name="write_file_in_repo",
     description="Creates a new file or overwrites an existing file with specified content within the active repository. Ensures parent directories are created.",
 )
-def write_file_in_repo(
+async def write_file_in_repo(
     ctx: Context,
     relative_file_path: Annotated[str, "The path of the file relative to the active repository root (e.g., src/my_module.py)"],
     content: Annotated[str, "The string content to write to the file"],
@@ -734,32 +1422,33 @@ def write_file_in_repo(
     try:
         full_file_path = os.path.join(base_path, relative_file_path)
         
-        ctx.info(f"Attempting to write file in active repo: {full_file_path}")
+        await _ctx_log(ctx, "info", "Attempting to write file in active repo: %s", full_file_path)
         
         # Ensure parent directory exists
         parent_dir = os.path.dirname(full_file_path)
         if parent_dir: # Check if parent_dir is not an empty string (e.g. for top-level files)
             os.makedirs(parent_dir, exist_ok=True)
-            ctx.info(f"Ensured directory exists: {parent_dir}")
+            await _ctx_log(ctx, "info", "Ensured directory exists: %s", parent_dir)
         
-        with open(full_file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-            
+        _write_text_file(full_file_path, content)
+
         success_msg = f"Successfully wrote content to {full_file_path}"
-        ctx.info(success_msg)
+        await _ctx_log(ctx, "info", success_msg)
         return success_msg
 
     except Exception as e:
         error_msg = f"Error writing file {os.path.join(base_path, relative_file_path) if active_repo_details['path'] else relative_file_path} in active repo: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg 
+    finally:
+        _invalidate_git_read_cache(base_path)
 
 
 @mcp.tool(
     name="list_files_in_repo",
-    description="Lists all files within the active repository, providing their paths relative to the repo root.",
+    description="Lists all files within the active repository that git tracks or would track (files ignored via .gitignore are skipped), providing their paths relative to the repo root. The listing is cached for up to 2 seconds, so files created or deleted outside these tools may take that long to show up.",
 )
-def list_files_in_repo(
+async def list_files_in_repo(
     ctx: Context,
 ) -> str:
     """Lists all files in the active repository."""
@@ -768,23 +1457,32 @@ def list_files_in_repo(
         return "Error: No active repository. Please clone a repository first using 'clone_repository'."
 
     repo_root_path = active_repo_details["path"]
-    file_list = []
 
-    try:
-        ctx.info(f"Listing all files in active repo: {repo_root_path}")
-        for root, _, files in os.walk(repo_root_path):
-            for file_name in files:
-                full_path = os.path.join(root, file_name)
-                relative_path = os.path.relpath(full_path, repo_root_path)
-                file_list.append(relative_path)
+    def list_files() -> str:
+        try:
+            # Tracked plus untracked-but-not-ignored files, straight from git's index
+            file_list = _repo_file_list(repo_root_path)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            # Not a git work tree (or git is missing): walk the file system instead
+            file_list = _scan_files(repo_root_path)
+        # Code point order on str matches byte order on the UTF-8 paths (git's own order),
+        # and for ASCII paths CPython compares str with memcmp, so there is no need to sort bytes.
+        # git's listing is already two sorted runs, which the sort merges in linear time;
+        # only the walk's scandir order needs a full sort.
+        file_list.sort()
         
         if not file_list:
             return "No files found in the active repository."
         
         # Return as a newline-separated string for readability
-        return "Files in repository:\n" + "\n".join(sorted(file_list))
+        return "Files in repository:\n" + "\n".join(file_list)
+
+    try:
+        await _ctx_log(ctx, "info", "Listing all files in active repo: %s", repo_root_path)
+        # The finished listing is cached, so repeat calls on an unchanged repository skip both git and the walk
+        return _cached(repo_root_path, "list-files", (), list_files)
 
     except Exception as e:
         error_msg = f"Error listing files in active repo {repo_root_path}: {str(e)}"
-        ctx.error(error_msg)
+        await _ctx_log(ctx, "error", error_msg)
         return error_msg 
\ No newline at end of file
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Simple test script for the Git PR MCP server."""
+
+import asyncio
+import logging
+import sys
+
+import pytest
+
+
+# Mock context for testing; log lines are buffered and written out in one go by flush()
+class MockContext:
+    __slots__ = ("buf",)
+
+    def __init__(self):
+        self.buf = []
+    async def info(self, msg):
+        self.buf += (b"  INFO: ", str(msg).encode(), b"\n")
+    async def error(self, msg):
+        self.buf += (b"  ERROR: ", str(msg).encode(), b"\n")
+    def write(self, text):
+        self.buf.append(text.encode())
+    def flush(self):
+        sys.stdout.flush()
+        sys.stdout.buffer.writelines(self.buf)
+        sys.stdout.buffer.flush()
+        self.buf.clear()
+
+
+# Context whose log methods are no-ops, for runs where the output is not shown
+class NullContext:
+    __slots__ = ()
+    write = staticmethod(lambda _msg: None)
+
+    async def info(self, msg):
+        pass
+    error = warning = info
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture(scope="session")
+def server():
+    """Imports the server module once for every test in the session, with logging switched off."""
+    from src.git_pr_mcp import server
+    logging.disable(logging.CRITICAL)
+    yield server
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def ctx(request):
+    """A MockContext when pytest shows output (-s), otherwise a NullContext."""
+    return MockContext() if request.config.getoption("capture") == "no" else NullContext()
+
+
+def test_server_import(server):
+    """The server module imports and exposes the MCP app."""
+    assert server.mcp.name
+
+
+# Each tool reports failures as an "Error ..." string, so the tests check for the success output instead
+@pytest.mark.parametrize("tool_name, args, expected_prefixes", [
+    ("get_git_status", (".",), ("Git Status:\n", "Repository is clean")),
+    ("list_branches", (".", False), ("Branches:\n",)),
+    ("get_commit_history", (None, 5, "."), ("Recent commits:\n",)),
+    ("get_git_diff", (None, "."), ("Git Diff (working directory vs HEAD):\n", "No differences found")),
+])
+def test_tool(server, ctx, tool_name, args, expected_prefixes):
+    """Each read-only tool runs successfully against this checkout."""
+    result = asyncio.run(getattr(server, tool_name)(ctx, *args))
+    ctx.write(f"  ✓ {tool_name}: {result[:100]}...\n")
+    ctx.flush()
+    assert not result.startswith("Error"), result
+    assert result.startswith(expected_prefixes), result
+
+
+if __name__ == "__main__":
+    exit_code = pytest.main(["-q", __file__])
+    sys.stdout.write(
+        "\nTo run the Git PR MCP Server:\n"
+        "  Default (0.0.0.0:8000):     uv run python main.py\n"
+        "  Custom host/port:           MCP_HOST=localhost MCP_PORT=3000 uv run python main.py\n"
+    )
+    sys.exit(exit_code)
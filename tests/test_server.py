@@ -1,5 +1,37 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
 import unittest
-from src.git_pr_mcp.server import _parse_repo_url
+from unittest import mock
+from src.git_pr_mcp import server
+from src.git_pr_mcp.server import _parse_repo_url, _cached, _invalidate_git_read_cache, _GitWorker
+
+
+def _git(repo_path, *args):
+    """Runs git in repo_path with a fixed identity and returns its stdout."""
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "-c", "commit.gpgsign=false", *args],
+        cwd=repo_path, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+class AsyncRecordingContext:
+    """Stands in for the MCP Context, keeping every message it is sent; the log methods are coroutines as on FastMCP's Context."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def info(self, msg):
+        self.messages.append(("info", msg))
+
+    async def warning(self, msg):
+        self.messages.append(("warning", msg))
+
+    async def error(self, msg):
+        self.messages.append(("error", msg))
+
 
 class TestParseRepoURL(unittest.TestCase):
 
@@ -39,6 +71,16 @@ class TestParseRepoURL(unittest.TestCase):
         self.assertEqual(owner_no_suffix, "owner-123")
         self.assertEqual(name_no_suffix, "repo-name-456")
 
+    def test_trailing_slash(self):
+        owner, name = _parse_repo_url("https://github.com/testowner/testrepo/")
+        self.assertEqual(owner, "testowner")
+        self.assertEqual(name, "testrepo")
+
+    def test_prefix_must_start_the_url(self):
+        owner, name = _parse_repo_url("see https://github.com/testowner/testrepo")
+        self.assertIsNone(owner)
+        self.assertIsNone(name)
+
     def test_specific_user_url(self):
         url = "https://github.com/peterj/mcpplayground.git"
         owner, name = _parse_repo_url(url)
@@ -65,6 +107,7 @@ class TestParseRepoURL(unittest.TestCase):
             "git@github.com",
             "git@github.com:",
             "git@github.com:/",
+            "https://github.com/owner/repo name",  # Characters GitHub does not allow
         ]
         for url in invalid_urls:
             with self.subTest(url=url):
@@ -73,24 +116,10 @@ class TestParseRepoURL(unittest.TestCase):
                 self.assertIsNone(name, f"Name should be None for {url}")
     
     def test_url_with_dot_in_repo_name(self):
-        # The regex `([^/\\.]+?)` for repo name might have issues with dots
-        # The pattern is `([^/\\.]+?)` which means "one or more characters that are not a slash or a dot, non-greedy".
-        # This implies it will stop at the first dot. This test will likely fail with the current regex if the repo name has dots.
-        # Example: if repo is "my.repo.project" it would parse as "my"
-        # Let's confirm this behavior.
+        # Dots are valid in repository names; only a trailing .git suffix is removed
         url = "https://github.com/testowner/my.repo.name.git"
         owner, name = _parse_repo_url(url)
         self.assertEqual(owner, "testowner")
-        # Based on regex `([^/\\.]+?)`, it should capture "my"
-        # If the intention is to capture "my.repo.name", the regex needs adjustment for the name part.
-        # Current regex: ([^/\\.]+?)
-        # To capture dots in repo name, it could be: ([^/]+?) but then .git needs careful handling.
-        # Or, more simply, if .git is always the suffix to be removed: ([^/]+?) then remove .git if present.
-        # The current regex is `([^/\\.]+?)(?:\\.git)?$`.
-        # This means `name` is "one or more chars NOT / or ." followed by an optional ".git".
-        # So "my.repo.name.git" -> name will be "my"
-        # "myrepo.git" -> name will be "myrepo"
-        # "my.repo" (no .git suffix) -> name will be "my"
         self.assertEqual(name, "my.repo.name")
 
         url_no_suffix = "https://github.com/testowner/my.repo"
@@ -98,6 +127,504 @@ class TestParseRepoURL(unittest.TestCase):
         self.assertEqual(owner_no_suffix, "testowner")
         self.assertEqual(name_no_suffix, "my.repo")
 
+    def test_repeated_urls_are_memoized(self):
+        _parse_repo_url.cache_clear()
+        url = "https://github.com/cachedowner/cachedrepo.git"
+        self.assertEqual(_parse_repo_url(url), ("cachedowner", "cachedrepo"))
+        self.assertEqual(_parse_repo_url(url), ("cachedowner", "cachedrepo"))
+        info = _parse_repo_url.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+
+class TestGitReadCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = self.tmp.name
+        os.makedirs(os.path.join(self.repo_path, ".git"))
+        self.index_path = os.path.join(self.repo_path, ".git", "index")
+        with open(self.index_path, "w") as f:
+            f.write("")
+        self.calls = 0
+
+    def tearDown(self):
+        _invalidate_git_read_cache(self.repo_path)
+        self.tmp.cleanup()
+
+    def _read(self):
+        self.calls += 1
+        return self.calls
+
+    def test_repeated_reads_hit_cache(self):
+        self.assertEqual(_cached(self.repo_path, "status", (), self._read), 1)
+        self.assertEqual(_cached(self.repo_path, "status", (), self._read), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_args_are_part_of_key(self):
+        _cached(self.repo_path, "log", ("main", 5), self._read)
+        _cached(self.repo_path, "log", ("main", 10), self._read)
+        self.assertEqual(self.calls, 2)
+
+    def test_explicit_invalidation(self):
+        _cached(self.repo_path, "status", (), self._read)
+        _invalidate_git_read_cache(self.repo_path)
+        self.assertEqual(_cached(self.repo_path, "status", (), self._read), 2)
+
+    def test_index_change_invalidates(self):
+        _cached(self.repo_path, "status", (), self._read)
+        stat = os.stat(self.index_path)
+        os.utime(self.index_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(_cached(self.repo_path, "status", (), self._read), 2)
+
+    def test_errors_are_not_cached(self):
+        def failing():
+            raise RuntimeError("git failed")
+        with self.assertRaises(RuntimeError):
+            _cached(self.repo_path, "status", (), failing)
+        self.assertEqual(_cached(self.repo_path, "status", (), self._read), 1)
+
+
+class TestGitWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = self.tmp.name
+        _git(self.repo_path, "init", "-q")
+        os.makedirs(os.path.join(self.repo_path, "docs"))
+        with open(os.path.join(self.repo_path, "docs", "guide.md"), "w") as f:
+            f.write("# Guide\n")
+        self.binary = bytes(range(256)) + b"\n\0\n"
+        with open(os.path.join(self.repo_path, "logo.bin"), "wb") as f:
+            f.write(self.binary)
+        _git(self.repo_path, "add", ".")
+        _git(self.repo_path, "commit", "-q", "-m", "initial")
+        self.worker = _GitWorker(self.repo_path)
+        self.saved_repo_details = dict(server.active_repo_details)
+
+    def tearDown(self):
+        self.worker.close()
+        server.active_repo_details.clear()
+        server.active_repo_details.update(self.saved_repo_details)
+        server._close_git_worker(self.repo_path)
+        self.tmp.cleanup()
+
+    def test_reads_blob(self):
+        self.assertEqual(self.worker.read_object("HEAD:docs/guide.md"), ("blob", b"# Guide\n"))
+
+    def test_binary_blob_round_trips(self):
+        self.assertEqual(self.worker.read_object("HEAD:logo.bin"), ("blob", self.binary))
+        # The worker stays in sync with the stream after content containing newlines and NULs
+        self.assertEqual(self.worker.read_object("HEAD:docs/guide.md"), ("blob", b"# Guide\n"))
+
+    def test_missing_object(self):
+        self.assertEqual(self.worker.read_object("HEAD:no/such/file"), (None, None))
+        self.assertEqual(self.worker.read_object("no-such-ref:docs/guide.md"), (None, None))
+        self.assertEqual(self.worker.read_object("HEAD:docs/guide.md")[0], "blob")
+
+    def test_tree_object(self):
+        object_type, content = self.worker.read_object("HEAD:docs")
+        self.assertEqual(object_type, "tree")
+        self.assertIn(b"guide.md", content)
+
+    def test_rejects_newlines(self):
+        with self.assertRaises(ValueError):
+            self.worker.read_object("HEAD:docs/guide.md\nHEAD:logo.bin")
+
+    def test_restarts_after_process_dies(self):
+        self.worker.read_object("HEAD:docs/guide.md")
+        first_proc = self.worker._proc
+        first_proc.kill()
+        first_proc.wait()
+        self.assertEqual(self.worker.read_object("HEAD:docs/guide.md"), ("blob", b"# Guide\n"))
+        self.assertIsNot(self.worker._proc, first_proc)
+
+    def test_read_file_in_repo_with_ref(self):
+        server.active_repo_details["path"] = self.repo_path
+        ctx = AsyncRecordingContext()
+        with open(os.path.join(self.repo_path, "docs", "guide.md"), "w") as f:
+            f.write("# Edited\n")
+        self.assertEqual(asyncio.run(server.read_file_in_repo(ctx, "docs/guide.md", ref="HEAD")), "# Guide\n")
+        self.assertEqual(asyncio.run(server.read_file_in_repo(ctx, "docs/guide.md")), "# Edited\n")
+        self.assertTrue(asyncio.run(server.read_file_in_repo(ctx, "missing.md", ref="HEAD")).startswith("Error: File not found"))
+        self.assertTrue(asyncio.run(server.read_file_in_repo(ctx, "docs", ref="HEAD")).startswith("Error: Path exists but is not a file"))
+
+
+class TestReadFilesInRepo(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = os.path.join(self.tmp.name, "repo")
+        os.makedirs(os.path.join(self.repo_path, "src"))
+        with open(os.path.join(self.repo_path, "README.md"), "w") as f:
+            f.write("# Readme\n")
+        with open(os.path.join(self.repo_path, "src", "app.py"), "w") as f:
+            f.write("print('hi')\n")
+        with open(os.path.join(self.tmp.name, "secret.txt"), "w") as f:
+            f.write("outside\n")
+        os.symlink(os.path.join(self.tmp.name, "secret.txt"), os.path.join(self.repo_path, "link.txt"))
+        self.saved_repo_details = dict(server.active_repo_details)
+        server.active_repo_details["path"] = self.repo_path
+
+    def tearDown(self):
+        server.active_repo_details.clear()
+        server.active_repo_details.update(self.saved_repo_details)
+        self.tmp.cleanup()
+
+    def test_mixed_batch(self):
+        paths = ["README.md", "src/app.py", "missing.txt", "src", "../secret.txt", "link.txt",
+                 os.path.join(self.tmp.name, "secret.txt")]
+        ctx = AsyncRecordingContext()
+        result = asyncio.run(server.read_files_in_repo(ctx, paths))
+        sections = result.split("\n\n==> ")
+        self.assertEqual(len(sections), len(paths))
+        self.assertEqual(sections[0], "==> README.md <==\n# Readme\n")
+        self.assertEqual(sections[1], "src/app.py <==\nprint('hi')\n")
+        self.assertTrue(sections[2].startswith("missing.txt <==\nError: File not found"))
+        self.assertTrue(sections[3].startswith("src <==\nError: Path exists but is not a file"))
+        for section, path in zip(sections[4:], paths[4:]):
+            self.assertEqual(section, f"{path} <==\nError: Path is outside the active repository: {path}")
+        self.assertNotIn("outside\n", result)
+        self.assertEqual(ctx.messages, [("info", f"Reading {len(paths)} files in active repo: {self.repo_path}")])
+
+    def test_read_file_in_repo_stays_inside(self):
+        ctx = AsyncRecordingContext()
+        self.assertEqual(asyncio.run(server.read_file_in_repo(ctx, "src/../README.md")), "# Readme\n")
+        for path in ("../secret.txt", "link.txt", os.path.join(self.tmp.name, "secret.txt")):
+            for ref in (None, "HEAD"):
+                with self.subTest(path=path, ref=ref):
+                    result = asyncio.run(server.read_file_in_repo(ctx, path, ref))
+                    self.assertEqual(result, f"Error: Path is outside the active repository: {path}")
+                    self.assertEqual(ctx.messages[-1], ("warning", result))
+
+    def test_requires_active_repo(self):
+        server.active_repo_details["path"] = None
+        result = asyncio.run(server.read_files_in_repo(AsyncRecordingContext(), ["README.md"]))
+        self.assertTrue(result.startswith("Error: No active repository"))
+
+
+class TestListFilesFallback(unittest.TestCase):
+    """list_files_in_repo walks the file system when the directory is not a git work tree."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = self.tmp.name
+        for relative_path in ("top.txt", "a/one.txt", "a/deep/two.txt", "b/three.txt", "c/four.txt",
+                              "node_modules/pkg/index.js", "a/__pycache__/x.pyc", ".venv/bin/python", ".git/HEAD"):
+            path = os.path.join(self.repo_path, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("x\n")
+        os.makedirs(os.path.join(self.repo_path, "locked"))
+        with open(os.path.join(self.repo_path, "locked", "hidden.txt"), "w") as f:
+            f.write("x\n")
+        os.symlink(os.path.join(self.repo_path, "a"), os.path.join(self.repo_path, "link-to-a"))
+        self.saved_repo_details = dict(server.active_repo_details)
+        server.active_repo_details["path"] = self.repo_path
+
+    def tearDown(self):
+        server.active_repo_details.clear()
+        server.active_repo_details.update(self.saved_repo_details)
+        _invalidate_git_read_cache(self.repo_path)
+        server._close_git_worker(self.repo_path)
+        self.tmp.cleanup()
+
+    def test_lists_files_without_git(self):
+        result = asyncio.run(server.list_files_in_repo(AsyncRecordingContext()))
+        self.assertEqual(result.split("\n"), [
+            "Files in repository:", "a/deep/two.txt", "a/one.txt", "b/three.txt", "c/four.txt",
+            "locked/hidden.txt", "top.txt",
+        ])
+
+    def test_parallel_and_inline_scans_agree(self):
+        self.assertEqual(sorted(server._scan_files(self.repo_path)), sorted(server._scan_files(self.repo_path, parallel=False)))
+
+    def test_unreadable_directory_is_skipped(self):
+        # Permission bits do not stop root, so make scandir itself refuse the directory
+        real_scandir = os.scandir
+        locked = os.path.join(self.repo_path, "locked")
+
+        def scandir(path):
+            if path == locked:
+                raise PermissionError(13, "Permission denied", path)
+            return real_scandir(path)
+
+        with mock.patch("os.scandir", side_effect=scandir):
+            files = sorted(server._scan_files(self.repo_path))
+        self.assertEqual(files, ["a/deep/two.txt", "a/one.txt", "b/three.txt", "c/four.txt", "top.txt"])
+
+
+class TestWorkingTreeReads(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = self.tmp.name
+        _git(self.repo_path, "init", "-q")
+        with open(os.path.join(self.repo_path, "notes.txt"), "w") as f:
+            f.write("one\n")
+        _git(self.repo_path, "add", ".")
+        _git(self.repo_path, "commit", "-q", "-m", "initial")
+
+    def tearDown(self):
+        server._close_git_worker(self.repo_path)
+        _invalidate_git_read_cache(self.repo_path)
+        self.tmp.cleanup()
+
+    def test_status_and_diff_see_outside_edits_immediately(self):
+        ctx = AsyncRecordingContext()
+        self.assertIn("clean", asyncio.run(server.get_git_status(ctx, self.repo_path)))
+        self.assertIn("No differences", asyncio.run(server.get_git_diff(ctx, None, self.repo_path)))
+        with open(os.path.join(self.repo_path, "notes.txt"), "a") as f:
+            f.write("two\n")
+        self.assertIn("M notes.txt", asyncio.run(server.get_git_status(ctx, self.repo_path)))
+        self.assertIn("+two", asyncio.run(server.get_git_diff(ctx, None, self.repo_path)))
+
+    def test_async_tools_await_context_logging(self):
+        ctx = AsyncRecordingContext()
+        asyncio.run(server.get_git_status(ctx, self.repo_path))
+        asyncio.run(server.list_branches(ctx, self.repo_path, False))
+        asyncio.run(server.get_commit_history(ctx, None, 1, self.repo_path))
+        asyncio.run(server.get_git_diff(ctx, None, self.repo_path))
+        self.assertEqual([level for level, _ in ctx.messages], ["info"] * 4)
+        self.assertEqual(ctx.messages[0], ("info", f"Getting git status for {self.repo_path}"))
+
+        ctx = AsyncRecordingContext()
+        result = asyncio.run(server.create_pr_summary("no-such-branch", ctx, None, self.repo_path))
+        self.assertTrue(result.startswith("Error"))
+        self.assertEqual(ctx.messages[-1], ("error", result))
+
+    def test_active_repo_tools_await_context_logging(self):
+        _git(self.repo_path, "config", "user.name", "Test")
+        _git(self.repo_path, "config", "user.email", "test@example.com")
+        ctx = AsyncRecordingContext()
+        with mock.patch.dict(server.active_repo_details, {"path": self.repo_path}):
+            self.assertTrue(asyncio.run(server.write_file_in_repo(ctx, "docs/new.txt", "new\n")).startswith("Successfully"))
+            self.assertEqual(asyncio.run(server.read_file_in_repo(ctx, "docs/new.txt")), "new\n")
+            self.assertIn("docs/new.txt", asyncio.run(server.list_files_in_repo(ctx)))
+            self.assertIn("created successfully", asyncio.run(server.create_git_branch(ctx, "topic")))
+            self.assertIn("committed successfully", asyncio.run(server.git_commit_changes(ctx, "Add new.txt")))
+            result = asyncio.run(server.read_file_in_repo(ctx, "missing.txt"))
+        self.assertTrue(result.startswith("Error: File not found"))
+        self.assertEqual(ctx.messages[0], ("info", f"Attempting to write file in active repo: {os.path.join(self.repo_path, 'docs/new.txt')}"))
+        self.assertEqual(ctx.messages[-1], ("warning", result))
+
+    def test_context_logging_follows_session_log_level(self):
+        class Session:
+            pass
+
+        ctx = AsyncRecordingContext()
+        ctx.session = Session()
+        server._set_session_log_level(ctx.session, "warning")
+        asyncio.run(server.get_git_status(ctx, self.repo_path))
+        self.assertEqual(ctx.messages, [])
+        result = asyncio.run(server.create_pr_summary("no-such-branch", ctx, None, self.repo_path))
+        self.assertEqual(ctx.messages, [("error", result)])
+
+        server._set_session_log_level(ctx.session, "debug")
+        asyncio.run(server.get_git_status(ctx, self.repo_path))
+        self.assertEqual(ctx.messages[-1], ("info", f"Getting git status for {self.repo_path}"))
+
+    def test_set_level_handler_is_registered(self):
+        from mcp import types
+        self.assertIn(types.SetLevelRequest, server.mcp._mcp_server.request_handlers)
+
+
+@unittest.skipIf(server.pygit2 is None, "pygit2 is not installed")
+class TestLibgit2MatchesCLI(unittest.TestCase):
+    """Each in-process libgit2 path must produce exactly what the git command it replaces prints."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_paths = []
+        origin = os.path.join(self.tmp.name, "origin.git")
+        _git(self.tmp.name, "init", "-q", "--bare", origin)
+        self.repo_path = self._repo("work")
+        _git(self.tmp.name, "init", "-q", "-b", "main", self.repo_path)
+        _git(self.repo_path, "config", "user.name", "Test")
+        _git(self.repo_path, "config", "user.email", "test@example.com")
+        self._write("moved.txt", "".join(f"{i}\n" for i in range(50)))
+        self._write("spa ce.txt", "space\n")
+        self._write("na\u00efve.txt", "naive\n")
+        self._write("gone.txt", "gone\n")
+        self._write("removed.txt", "removed\n")
+        self._write(".gitignore", "*.log\n")
+        _git(self.repo_path, "add", ".")
+        _git(self.repo_path, "commit", "-q", "-m", "First commit")
+        _git(self.repo_path, "mv", "moved.txt", "renamed.txt")
+        self._write("renamed.txt", "extra\n", mode="a")
+        _git(self.repo_path, "commit", "-q", "-am", "Rename and extend")
+        _git(self.repo_path, "remote", "add", "origin", origin)
+        _git(self.repo_path, "push", "-q", "-u", "origin", "main")
+        # main ends up ahead of origin/main; feature tracks the local main; stale tracks a branch that is gone
+        self._write("later.txt", "later\n")
+        _git(self.repo_path, "add", "later.txt")
+        # Verbatim, so git keeps the leading blank lines, runs of spaces, the tab, the CRLF and the
+        # whitespace-only line, which ends the subject for `git log` but not for `git branch -v`
+        _git(
+            self.repo_path, "commit", "-q", "--cleanup=verbatim", "-m",
+            "\n \n  Later  commit\twith   spacing  \nsecond line\r\n   \nthird\n\nWith a body",
+        )
+        _git(self.repo_path, "branch", "--track", "feature", "main")
+        _git(self.repo_path, "update-ref", "refs/heads/feature", "main~1")
+        _git(self.repo_path, "branch", "stale")
+        _git(self.repo_path, "config", "branch.stale.remote", "origin")
+        _git(self.repo_path, "config", "branch.stale.merge", "refs/heads/deleted")
+        # Staged rename and deletion, unstaged edits and deletion, untracked and ignored files
+        _git(self.repo_path, "mv", "spa ce.txt", "sp ace2.txt")
+        _git(self.repo_path, "rm", "-q", "gone.txt")
+        os.remove(os.path.join(self.repo_path, "removed.txt"))
+        self._write("na\u00efve.txt", "edited\n", mode="a")
+        self._write("renamed.txt", "more\n", mode="a")
+        self._write("untracked dir/n\u00e9w.txt", "new\n")
+        self._write("debug.log", "ignored\n")
+
+    def tearDown(self):
+        for repo_path in self.repo_paths:
+            server._close_git_worker(repo_path)
+            _invalidate_git_read_cache(repo_path)
+        self.tmp.cleanup()
+
+    def _repo(self, name):
+        repo_path = os.path.join(self.tmp.name, name)
+        self.repo_paths.append(repo_path)
+        return repo_path
+
+    def _write(self, relative_path, text, mode="w"):
+        path = os.path.join(self.repo_path, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, mode, encoding="utf-8") as f:
+            f.write(text)
+
+    def _copy(self, name):
+        repo_path = self._repo(name)
+        shutil.copytree(self.repo_path, repo_path, symlinks=True)
+        return repo_path
+
+    def _repository(self, repo_path=None):
+        return server.pygit2.Repository(repo_path or self.repo_path)
+
+    def test_status_matches_cli(self):
+        result = asyncio.run(server.get_git_status(AsyncRecordingContext(), self.repo_path))
+        expected = _git(self.repo_path, "status", "--porcelain").strip()
+        self.assertEqual(result, f"Git Status:\n{expected}")
+        self.assertIn('R  "spa ce.txt" -> "sp ace2.txt"', result)
+
+    def test_branches_match_cli(self):
+        repo = self._repository()
+        listing = server._libgit2_branches(repo, False)
+        self.assertEqual(listing, _git(self.repo_path, "branch", "-v").rstrip("\n"))
+        self.assertEqual(server._libgit2_branches(repo, True), _git(self.repo_path, "branch", "-v", "-a").rstrip("\n"))
+        self.assertIn("[ahead 1]", listing)
+        self.assertIn("[gone]", listing)
+        self.assertIn("feature", listing)
+
+    def test_detached_head_falls_back_to_cli(self):
+        _git(self.repo_path, "checkout", "-q", "--detach", "main~1")
+        with self.assertRaises(ValueError):
+            server._libgit2_branches(self._repository(), False)
+        result = asyncio.run(server.list_branches(AsyncRecordingContext(), self.repo_path, False))
+        self.assertEqual(result, "Branches:\n" + _git(self.repo_path, "branch", "-v").strip())
+
+    def test_log_matches_cli(self):
+        repo = self._repository()
+        for branch in (None, "main", "feature", "origin/main"):
+            for limit in (1, 2, 10):
+                with self.subTest(branch=branch, limit=limit):
+                    cmd = ["log", f"--max-count={limit}", "--oneline"] + ([branch] if branch else [])
+                    self.assertEqual(server._libgit2_log(repo, branch, limit), _git(self.repo_path, *cmd).rstrip("\n"))
+
+    def test_abbreviation_grows_with_object_count(self):
+        repo_path = self._repo("big")
+        _git(self.tmp.name, "init", "-q", repo_path)
+        # Enough packed objects for git to abbreviate to 8 characters instead of 7
+        commands = [f"blob\nmark :{i + 1}\ndata {len(str(i))}\n{i}\n" for i in range(17000)]
+        commands.append("commit refs/heads/main\ncommitter Test <test@example.com> 0 +0000\ndata 4\nbig\n")
+        commands += [f"M 100644 :{i + 1} f{i}\n" for i in range(17000)]
+        subprocess.run(["git", "fast-import", "--quiet"], cwd=repo_path, input="".join(commands) + "\n", text=True, check=True)
+        _git(repo_path, "symbolic-ref", "HEAD", "refs/heads/main")
+        repo = self._repository(repo_path)
+        expected = _git(repo_path, "log", "--oneline").rstrip("\n")
+        self.assertEqual(len(expected.split()[0]), 8)
+        self.assertEqual(server._libgit2_log(repo, None, 5), expected)
+        self.assertEqual(server._libgit2_branches(repo, False), _git(repo_path, "branch", "-v").rstrip("\n"))
+
+    def test_worktree_diff_matches_cli(self):
+        self.assertEqual(server._libgit2_diff(self._repository()), _git(self.repo_path, "diff"))
+
+    def test_diff_against_commit_matches_cli(self):
+        result = asyncio.run(server.get_git_diff(AsyncRecordingContext(), "HEAD~2", self.repo_path))
+        self.assertEqual(result, "Git Diff against HEAD~2:\n" + _git(self.repo_path, "diff", "HEAD~2").rstrip())
+        self.assertIn("rename from spa ce.txt", result)
+
+    def test_ls_files_matches_cli(self):
+        listed = _git(self.repo_path, "ls-files", "--cached", "--others", "--exclude-standard", "-z").rstrip("\0").split("\0")
+        deleted = _git(self.repo_path, "ls-files", "--deleted", "-z").rstrip("\0").split("\0")
+        self.assertEqual(deleted, ["removed.txt"])
+        expected = [path for path in listed if path not in deleted]
+        self.assertEqual(sorted(server._libgit2_ls_files(self._repository())), sorted(expected))
+        with mock.patch.object(server, "_libgit2_ls_files", side_effect=ValueError):
+            self.assertEqual(server._repo_file_list(self.repo_path), expected)
+
+    def _branch_state(self, repo_path):
+        return (
+            _git(repo_path, "symbolic-ref", "HEAD"),
+            _git(repo_path, "branch", "-vv"),
+            _git(repo_path, "status", "--porcelain"),
+        )
+
+    def test_create_branch_matches_cli(self):
+        for base in (None, "main", "origin/main"):
+            with self.subTest(base=base):
+                suffix = base.replace("/", "-") if base else "head"
+                fast, slow = self._copy(f"fast-{suffix}"), self._copy(f"slow-{suffix}")
+                for repo_path in (fast, slow):
+                    # Start at origin/main's commit, keeping the staged and unstaged changes
+                    _git(repo_path, "reset", "-q", "--soft", "origin/main")
+                self.assertTrue(server._libgit2_create_branch(self._repository(fast), "topic", base))
+                _git(slow, "checkout", "-q", "-b", "topic", *([base] if base else []))
+                self.assertEqual(self._branch_state(fast), self._branch_state(slow))
+
+    def test_create_branch_elsewhere_falls_back(self):
+        state = self._branch_state(self.repo_path)
+        for branch_name, base in (("topic", "main~1"), ("topic", "origin/main"), ("feature", None), ("topic", "no-such-ref")):
+            with self.subTest(branch_name=branch_name, base=base):
+                self.assertFalse(server._libgit2_create_branch(self._repository(), branch_name, base))
+                self.assertEqual(self._branch_state(self.repo_path), state)
+
+    def _commit_like_tool(self, repo_path, message):
+        """Commits the way git_commit_changes does: libgit2 when it accepts the job, else git add + git commit."""
+        committed = server._libgit2_commit(self._repository(repo_path), message)
+        if committed is None:
+            _git(repo_path, "add", ".")
+            _git(repo_path, "commit", "-q", "-m", message)
+        return committed
+
+    def test_commit_matches_cli(self):
+        message = "Subject  line   \n\n\n\nBody line  \n\n"
+        for case in ("plain", "clean filter"):
+            with self.subTest(case=case):
+                fast, slow = self._copy(f"fast-{case}"), self._copy(f"slow-{case}")
+                if case == "clean filter":
+                    # libgit2 skips external clean filters, so it would store "hello" where git stores "HELLO"
+                    # (and, with Git LFS, the raw file instead of its pointer)
+                    for repo_path in (fast, slow):
+                        _git(repo_path, "config", "filter.up.clean", "tr a-z A-Z")
+                        with open(os.path.join(repo_path, ".gitattributes"), "w") as f:
+                            f.write("*.txt filter=up\n")
+                        with open(os.path.join(repo_path, "filtered.txt"), "w") as f:
+                            f.write("hello\n")
+                committed = self._commit_like_tool(fast, message)
+                self.assertEqual(committed, True if case == "plain" else None)
+                _git(slow, "add", ".")
+                _git(slow, "commit", "-q", "-m", message)
+                for args in (["rev-parse", "HEAD^{tree}", "HEAD~1"], ["log", "-1", "--format=%an <%ae>%n%B"], ["status", "--porcelain"]):
+                    self.assertEqual(_git(fast, *args), _git(slow, *args))
+                if case == "clean filter":
+                    self.assertEqual(_git(fast, "show", "HEAD:filtered.txt"), "HELLO\n")
+                    _git(fast, "config", "--unset", "filter.up.clean")
+                    _git(fast, "config", "filter.up.process", "filter-daemon")
+                    self.assertIsNone(server._libgit2_commit(self._repository(fast), "Process filter"))
+                else:
+                    self.assertFalse(server._libgit2_commit(self._repository(fast), "Nothing to add"))
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file